@@ -1,12 +1,19 @@
 from http.server import BaseHTTPRequestHandler, HTTPServer
 import urllib.parse
+import threading
 import logging
 import logging.config
 
-# Configure logging
-logging.config.fileConfig("log.conf")
+# Configure logging, unless another module of the repo already did
+if not logging.getLogger().handlers:
+    logging.config.fileConfig("log.conf", disable_existing_loggers=False)
 server_logger = logging.getLogger("local_server")
 
+# Confirmation page sent once the authorization code is received, encoded once at import
+_OK_HTML = (b"<html><body><h1>Authorization Successful</h1>"
+            b"<p>You can close this window.</p></body></html>")
+_OK_LEN = str(len(_OK_HTML))  # send_header formats its value with %s, so keep it a str
+
 class AuthHandler(BaseHTTPRequestHandler):
     """Handles HTTP GET requests for authentication and extracts an authorization code."""
     
@@ -26,21 +33,14 @@ class AuthHandler(BaseHTTPRequestHandler):
             
             # Send a response to the user
             self.send_response(200)
-            self.send_header("Content-type", "text/html")
+            self.send_header("Content-type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", _OK_LEN)  # Lets the browser finish reading without waiting for the socket to close
             self.end_headers()
-            html_content = """
-            <html>
-                <body>
-                    <h1>Authorization Successful</h1>
-                    <p>You can close this window.</p>
-                </body>
-            </html>
-            """
-            self.wfile.write(html_content.encode("utf-8"))  # Encode as UTF-8
+            self.wfile.write(_OK_HTML)
             
             # Stop the server after receiving the auth code
             self.server.auth_code = auth_code
-            self.server.running = False  # Set flag to stop the server
+            self.server.auth_received.set()  # Wake up run_local_server to shut the server down
 
     def log_message(self, format, *args):  
         """Overrides default logging to suppress terminal logging."""
@@ -57,9 +57,12 @@ def run_local_server(port: int):
     """
     server_address = ("", port)
     with HTTPServer(server_address, AuthHandler) as httpd:
-        httpd.running = True
         httpd.auth_code = None
-        while httpd.running:
-            httpd.handle_request()  # This blocks execution until shutdown is called
+        httpd.auth_received = threading.Event()
+        server_thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        server_thread.start()
+        httpd.auth_received.wait()  # This blocks execution until the auth code is received
+        httpd.shutdown()
+        server_thread.join()
         auth_code = httpd.auth_code
     return auth_code
\ No newline at end of file
@@ -0,0 +1,47 @@
+import functools
+import os
+import orjson
+
+def _cache_key(path: str) -> tuple:
+    """Build the cache key of a file, which changes whenever the file is rewritten.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        tuple: The path along with the modification time (in ns) and size of the file.
+    """
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+@functools.lru_cache(maxsize=8)
+def _load_json(path: str, mtime_ns: int, size: int) -> dict:
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+@functools.lru_cache(maxsize=8)
+def _load_text(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+def load_json(path: str) -> dict:
+    """Load a JSON file, reusing the parsed contents until the file is modified.
+
+    Args:
+        path (str): Path of the JSON file.
+
+    Returns:
+        dict: The parsed contents of the file. It is shared between callers and must not be modified.
+    """
+    return _load_json(*_cache_key(path))
+
+def load_text(path: str) -> str:
+    """Load a text file, reusing the contents until the file is modified.
+
+    Args:
+        path (str): Path of the text file.
+
+    Returns:
+        str: The contents of the file.
+    """
+    return _load_text(*_cache_key(path))
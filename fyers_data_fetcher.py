@@ -1,27 +1,55 @@
-import json
+import asyncio
 import logging.config
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
 import logging
 import datetime as dt
 import os
+from numba import njit, prange
+from aiolimiter import AsyncLimiter
 from fyers_apiv3 import fyersModel
 import authentication_handler as auth_hand
+import config_cache
 
 API_CRED_FNAME = "api_cred.json"
 DATA_PARAMETERS_FNAME = "data_parameters.json"
 ACCESS_TOKEN_FNAME = "access_token.txt"
 
-# Data retrieval limits for Fyers API
-DATA_LIMIT_DAYS = { "1": 100, "5": 100, "15": 100, "30": 100, "45": 100, "60": 100, "D": 365}
+# Data retrieval limits for Fyers API, the maximum number of days between range_from and range_to of a request.
+# The API caps a request by days rather than by candles, so every chunk is made as wide as the limit allows.
+DATA_LIMIT_DAYS = {
+    "1": 100, "2": 100, "3": 100, "5": 100, "10": 100, "15": 100, "20": 100, "30": 100,
+    "45": 100, "60": 100, "120": 100, "240": 100, "D": 365, "1D": 365
+}
+
+# Offset of IST (Asia/Kolkata) from UTC in seconds, IST has no daylight saving
+IST_OFFSET_SECONDS = 5 * 3600 + 30 * 60
+
+# Default request limits, overridden by "MaxConnections" and "RequestsPerSecond" in api_cred.json
+MAX_CONNECTIONS = 8
+REQUESTS_PER_SECOND = 10
+
+# Retry policy for history requests which fail transiently (rate limited, server errors or the SDK's
+# -99 network failure code), the wait doubles after every attempt; other failures are raised at once
+HTTP_RETRIES = 3
+HTTP_BACKOFF_SECONDS = 0.3
+HTTP_NETWORK_ERROR_CODE = -99
 
 # Paths to save fetched data
 SAVE_TO_FOLDER = "downloaded_data"
+CACHE_FOLDER = "cache"
+
+# Daily candles are fetched a year per request, so reading and writing them as one file per day
+# is slower than fetching them again; only intraday resolutions are cached
+UNCACHED_RESOLUTIONS = ("D", "1D")
 
 os.makedirs(SAVE_TO_FOLDER, exist_ok=True)
 
-# Configure logging
-logging.config.fileConfig("log.conf")
+# Configure logging, unless another module of the repo already did
+if not logging.getLogger().handlers:
+    logging.config.fileConfig("log.conf", disable_existing_loggers=False)
 logger_main = logging.getLogger("main")
 
 def read_json_file(filename: str) -> dict:
@@ -34,12 +62,11 @@ def read_json_file(filename: str) -> dict:
         dict: A dictionary of API credentials for Fyers.
     """
     try:
-        with open(filename, "r") as f:
-            credentials = json.load(f)
-        logging.info(f"Successfully read {filename}.")
+        credentials = config_cache.load_json(filename)
+        logging.info("Successfully read %s.", filename)
         return credentials
     except Exception as e:
-        logging.info(f"Error reading {filename}: {e}")
+        logging.info("Error reading %s: %s", filename, e)
         raise
 
 def read_data_parameters_file(filename: str) -> dict:
@@ -52,12 +79,11 @@ def read_data_parameters_file(filename: str) -> dict:
         dict: A dictionary of data fetching parameters.
     """
     try:
-        with open(filename, "r") as f:
-            data_parameters = json.load(f)
-        logger_main.info(f"Successfully read {filename}.")
+        data_parameters = config_cache.load_json(filename)
+        logger_main.info("Successfully read %s.", filename)
         return data_parameters
     except Exception as e:
-        logger_main.info(f"Error reading {filename}: {e}")
+        logger_main.info("Error reading %s: %s", filename, e)
         raise
 
 def read_access_token(filename: str) -> str:
@@ -70,16 +96,18 @@ def read_access_token(filename: str) -> str:
         str: The access token.
     """
     try:
-        with open(filename, "r") as f:
-            access_token = f.read().strip()
-        logger_main.info(f"Successfully read access token from: {filename}.")
+        access_token = config_cache.load_text(filename).strip()
+        logger_main.info("Successfully read access token from: %s.", filename)
         return access_token
     except Exception as e:
-        logger_main.error(f"Access token file {filename} missing: {e}")
+        logger_main.error("Access token file %s missing: %s", filename, e)
         raise
 
 def write_access_token(access_token: str, filename: str) -> None:
     """Write access token to a file.
+
+    The token is written to a temporary file which then replaces the original, so a crash while
+    writing never leaves behind an empty or partial token file.
     
     Args:
         access_token (str): The access token to be written to the file.
@@ -89,11 +117,13 @@ def write_access_token(access_token: str, filename: str) -> None:
         None.
     """
     try:
-        with open(filename, "w") as f:
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "w") as f:
             f.write(access_token)
-        logger_main.info(f"Access token written to file: {filename}")
+        os.replace(tmp_filename, filename)
+        logger_main.info("Access token written to file: %s", filename)
     except Exception as e:
-        logger_main.error(f"Error writing access token to file: {e}")
+        logger_main.error("Error writing access token to file: %s", e)
         raise
 
 def get_authentication_link(credentials: dict) -> str:
@@ -113,10 +143,10 @@ def get_authentication_link(credentials: dict) -> str:
             response_type=credentials["ResponseType"]
         )
         auth_link = session.generate_authcode()
-        logger_main.info(f"Successfully generated Authentication link.")
+        logger_main.info("Successfully generated Authentication link.")
         return auth_link
     except Exception as e:
-        logger_main.error(f"Error generating Authentication link: {e}")
+        logger_main.error("Error generating Authentication link: %s", e)
         raise
 
 def extract_auth_code(uri: str) -> str:
@@ -130,10 +160,10 @@ def extract_auth_code(uri: str) -> str:
     """
     try:
         auth_code = uri.split("auth_code=")[1].split("&")[0]
-        logger_main.info(f"Successfully extracted the auth code.")
+        logger_main.info("Successfully extracted the auth code.")
         return auth_code
     except Exception as e:
-        logger_main.error(f"Error extracting auth code: {e}")
+        logger_main.error("Error extracting auth code: %s", e)
         raise
 
 def generate_access_token(credentials: dict, auth_code: str) -> str:
@@ -156,14 +186,17 @@ def generate_access_token(credentials: dict, auth_code: str) -> str:
         )
         session.set_token(auth_code)
         access_token =  session.generate_token()["access_token"]
-        logger_main.info(f"Successfully generated access token.")
+        logger_main.info("Successfully generated access token.")
         return access_token
     except Exception as e:
-        logger_main.error(f"Error generating access token: {e}")
+        logger_main.error("Error generating access token: %s", e)
         raise
 
 def create_fyers_session(credentials: dict, access_token: str) -> fyersModel.FyersModel:
     """Create an authenticated session with Fyers API.
+
+    The session is created in async mode, its API calls return awaitables which share a single
+    `aiohttp.ClientSession`, so the chunk requests reuse kept-alive connections.
     
     Args:
         credentials (dict): Dictionary of API credentials.
@@ -173,30 +206,61 @@ def create_fyers_session(credentials: dict, access_token: str) -> fyersModel.Fye
         fyersModel.FyersModel: A Fyers API session which can be used to fetch data or other supported API calls.
     """
     try:
-        return fyersModel.FyersModel(client_id = credentials["ClientID"], is_async = False, token = access_token, log_path = "")
+        return fyersModel.FyersModel(client_id = credentials["ClientID"], is_async = True, token = access_token, log_path = "")
     except Exception as e:
-        logger_main.error(f"Error creating session: {e}")
+        logger_main.error("Error creating session: %s", e)
         raise
 
-def format_historical_prices(candle_data: np.ndarray) -> pd.DataFrame:
+@njit(parallel=True, cache=True)
+def _convert_candles(raw: np.ndarray, offset: int, ts_out: np.ndarray, ohlc_out: np.ndarray, vol_out: np.ndarray) -> None:
+    """Convert one chunk of raw candles into the output columns, starting at row `offset`.
+
+    Args:
+        raw (np.ndarray): The candles of the chunk of shape (n,6).
+        offset (int): The row of the output columns at which the chunk starts.
+        ts_out (np.ndarray): The output IST timestamps, floored to the minute, in ns.
+        ohlc_out (np.ndarray): The output open, high, low and close prices of shape (4,N).
+        vol_out (np.ndarray): The output volumes.
+    """
+    for i in prange(raw.shape[0]):
+        ts_out[offset + i] = (np.int64(raw[i, 0]) + IST_OFFSET_SECONDS) // 60 * 60 * 1_000_000_000
+        for j in range(4):
+            ohlc_out[j, offset + i] = raw[i, j + 1]
+        vol_out[offset + i] = np.int64(raw[i, 5])
+
+def format_historical_prices(candle_chunks: list) -> pd.DataFrame:
     """Format historical prices into a DataFrame.
+
+    Each chunk is converted by a single Numba kernel straight into the preallocated columns
+    of the dataframe, so the candles are copied only once.
     
     Args:
-        candle_data (np.ndarray): The OHLC data of shape (N,5), where N is the size of the time-series.
+        candle_chunks (List[np.ndarray]): The OHLC data of each chunk, of shape (n,6) where n is the size of the chunk.
     
     Returns:
-        pd.DataFrame: The numpy array formatted and returned as a dataframe.
+        pd.DataFrame: The numpy arrays formatted and returned as a dataframe.
     """
-    df = pd.DataFrame(candle_data, columns=["date_time", "open", "high", "low", "close", "volume"])
-    df["date_time"] = pd.to_datetime(df["date_time"], unit="s")
-    df["date_time"] = df["date_time"].dt.tz_localize('utc').dt.tz_convert('Asia/Kolkata')
-    df["date_time"] = df["date_time"].dt.tz_localize(None)
-    df["date_time"] = df["date_time"].dt.floor("min")
-    df["volume"] = df["volume"].astype(int)
-    return df
+    n = sum(len(chunk) for chunk in candle_chunks)
+    ts = np.empty(n, dtype=np.int64)
+    ohlc = np.empty((4, n), dtype=np.float64)
+    volume = np.empty(n, dtype=np.int64)
+    offset = 0
+    for chunk in candle_chunks:
+        _convert_candles(chunk, offset, ts, ohlc, volume)
+        offset += len(chunk)
+    return pd.DataFrame({
+        "date_time": ts.view("datetime64[ns]"),
+        "open": ohlc[0],
+        "high": ohlc[1],
+        "low": ohlc[2],
+        "close": ohlc[3],
+        "volume": volume,
+    }, copy=False)
 
 def get_date_ranges(start_date: str, end_date: str, resolution: str) -> list:
     """Split date range into chunks based on API limits.
+
+    Each chunk spans the full window allowed for the resolution, so the data is fetched in as few requests as possible.
     
     Args:
         start_date (str): The start date for fetching the historical data in the format dd-mm-YYYY.
@@ -210,54 +274,251 @@ def get_date_ranges(start_date: str, end_date: str, resolution: str) -> list:
     end_dt = dt.datetime.strptime(end_date, "%d-%m-%Y").date()
     delta = dt.timedelta(days=DATA_LIMIT_DAYS.get(resolution, 100))
     date_ranges = []
-    while start_dt < end_dt:
+    while start_dt <= end_dt:
         next_dt = min(start_dt + delta, end_dt)
         date_ranges.append((start_dt.strftime("%Y-%m-%d"), next_dt.strftime("%Y-%m-%d")))
         start_dt = next_dt + dt.timedelta(days=1)
     return date_ranges
 
-def fetch_historical_data(session: fyersModel.FyersModel, symbol: str, resolution: str, start_date: str, end_date: str) -> pd.DataFrame:
+def get_ist_today() -> dt.date:
+    """Get today's date in IST, which is the calendar the candles and the cache are keyed on.
+
+    Returns:
+        dt.date: Today's date in IST, regardless of the timezone of the machine.
+    """
+    return dt.datetime.now(dt.timezone(dt.timedelta(seconds=IST_OFFSET_SECONDS))).date()
+
+def get_cache_path(symbol: str, resolution: str, day: dt.date) -> str:
+    """Get the path of the cached candles of a symbol for a day.
+
+    Args:
+        symbol (str): The symbol of the cached data.
+        resolution (str): The resolution of the cached data ex "D" for 1-day, "1" for 1-min etc.
+        day (dt.date): The day of the cached data.
+
+    Returns:
+        str: The path of the Parquet file, CACHE_FOLDER/<symbol>/<resolution>/YYYY-mm-dd.parquet.
+    """
+    return os.path.join(CACHE_FOLDER, symbol.replace(":", "_"), resolution, f"{day:%Y-%m-%d}.parquet")
+
+def get_missing_date_ranges(days: list, cached_days, resolution: str) -> list:
+    """Split the days which are not cached yet into chunks based on API limits.
+
+    Today and later days are never cached as their candles are not final yet, so they are always fetched.
+
+    Args:
+        days (List[dt.date]): The consecutive days for which the historical data is requested.
+        cached_days (Iterable[dt.date]): The days which were loaded from the cache.
+        resolution (str): The resolution of the data to be fetched ex "D" for 1-day, "1" for 1-min etc.
+
+    Returns:
+        List[Tuple[str, str]]: The chunks of `get_date_ranges` for every run of consecutive missing days.
+    """
+    today = get_ist_today()
+    missing = [day for day in days if day >= today or day not in cached_days]
+    date_ranges = []
+    run_start = None
+    for i, day in enumerate(missing):
+        run_start = run_start or day
+        if i + 1 == len(missing) or missing[i + 1] != day + dt.timedelta(days=1):
+            date_ranges += get_date_ranges(run_start.strftime("%d-%m-%Y"), day.strftime("%d-%m-%Y"), resolution)
+            run_start = None
+    return date_ranges
+
+def load_cached_data(symbol: str, resolution: str, days: list) -> dict:
+    """Load the cached candles of the given days.
+
+    A file which cannot be read is removed with a warning and its day is left out, so that it is
+    fetched again instead of failing the whole fetch.
+
+    Args:
+        symbol (str): The symbol of the cached data.
+        resolution (str): The resolution of the cached data ex "D" for 1-day, "1" for 1-min etc.
+        days (List[dt.date]): The days for which the historical data is requested.
+
+    Returns:
+        Dict[dt.date, pd.DataFrame]: The candles of each cached day, days which are not cached are left out.
+    """
+    today = get_ist_today()
+    day_data = {}
+    for day in days:
+        path = get_cache_path(symbol, resolution, day)
+        if day >= today or not os.path.exists(path):
+            continue
+        try:
+            day_data[day] = pd.read_parquet(path, engine="pyarrow")
+        except Exception as e:
+            logger_main.warning("Unreadable cache file %s, it will be fetched again: %s", path, e)
+            try:
+                os.remove(path)
+            except OSError as remove_error:
+                logger_main.warning("Error removing cache file %s: %s", path, remove_error)
+    return day_data
+
+def split_data_by_day(df: pd.DataFrame, days: list) -> dict:
+    """Split the fetched data by calendar day.
+
+    Args:
+        df (pd.DataFrame): The fetched data, sorted by date_time.
+        days (List[dt.date]): The days to split the data into, days without candles get an empty dataframe.
+
+    Returns:
+        Dict[dt.date, pd.DataFrame]: The candles of each day.
+    """
+    df_days = df["date_time"].to_numpy().astype("datetime64[D]")
+    day_starts = np.array(days, dtype="datetime64[D]")
+    lo = np.searchsorted(df_days, day_starts, side="left")
+    hi = np.searchsorted(df_days, day_starts, side="right")
+    return {day: df.iloc[l:h] for day, l, h in zip(days, lo, hi)}
+
+def save_data_to_cache(day_data: dict, symbol: str, resolution: str) -> None:
+    """Save the fetched data of each completed day to the cache.
+
+    A cache file is trusted as soon as it exists, so each day is written to a temporary file
+    which then replaces the cache file and an interrupted run never leaves a partial one behind.
+
+    Args:
+        day_data (Dict[dt.date, pd.DataFrame]): The candles of each fetched day.
+        symbol (str): The symbol of the fetched data.
+        resolution (str): The resolution of the fetched data ex "D" for 1-day, "1" for 1-min etc.
+
+    Returns:
+        None
+    """
+    today = get_ist_today()
+    try:
+        for day, df in day_data.items():
+            if day < today:
+                path = get_cache_path(symbol, resolution, day)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + ".tmp"
+                df.to_parquet(tmp_path, engine="pyarrow", index=False)
+                os.replace(tmp_path, path)
+    except Exception as e:
+        logger_main.error("Error saving data to cache: %s", e)
+        raise
+
+def _is_transient_error(response: dict) -> bool:
+    """Check whether a failed API response is worth retrying.
+
+    Args:
+        response (dict): The response returned by the SDK.
+
+    Returns:
+        bool: True if the request was rate limited, hit a server error or failed at the network level.
+    """
+    code = response.get("code")
+    return code == 429 or code == HTTP_NETWORK_ERROR_CODE or (isinstance(code, int) and 500 <= code < 600)
+
+async def _fetch_one(session: fyersModel.FyersModel, semaphore: asyncio.Semaphore, limiter: AsyncLimiter, symbol: str, resolution: str, start: str, end: str) -> np.ndarray:
+    """Fetch a single chunk of historical data, retrying transiently failed requests.
+
+    Args:
+        session (fyersModel.FyersModel): An API access authenticated FyersModel in async mode.
+        semaphore (asyncio.Semaphore): Bounds the number of requests in flight.
+        limiter (AsyncLimiter): Bounds the number of requests made per second.
+        symbol (str): The symbol for which the historical data is to be fetched.
+        resolution (str): The resolution of the data to be fetched ex "D" for 1-day, "1" for 1-min etc.
+        start (str): The start date of the chunk in the format YYYY-mm-dd.
+        end (str): The end date of the chunk in the format YYYY-mm-dd.
+
+    Returns:
+        np.ndarray: The candles of the chunk as an array of shape (N,6), which is empty if there is no data for the chunk.
+    """
+    for attempt in range(HTTP_RETRIES + 1):
+        async with limiter, semaphore:
+            response = await session.history({"symbol": symbol, "resolution": resolution, "date_format": "1", "range_from": start, "range_to": end})
+        # The SDK returns the error response instead of raising, it has no candles
+        if "candles" in response or not _is_transient_error(response) or attempt == HTTP_RETRIES:
+            break
+        await asyncio.sleep(HTTP_BACKOFF_SECONDS * 2 ** attempt)
+    if response.get("candles"):
+        logger_main.info("Fetched data: %s to %s", start, end)
+        # Convert the chunk as soon as it arrives so its Python lists are freed right away; the array
+        # is copied only once more, by _convert_candles straight into the columns of the dataframe
+        return np.asarray(response["candles"], dtype=np.float64)
+    # Only a successful response without candles means there is no data, anything else is a failed request
+    if response.get("s") not in ("ok", "no_data"):
+        raise Exception(f"Request failed for {start} to {end}: {response.get('message')}")
+    # Chunks made up of holidays have no candles, they are cached empty so they are not requested again
+    logger_main.warning("Data not available for %s to %s", start, end)
+    return np.empty((0, 6), dtype=np.float64)
+
+async def fetch_historical_data(session: fyersModel.FyersModel, symbol: str, resolution: str, start_date: str, end_date: str,
+                                max_connections: int = MAX_CONNECTIONS, requests_per_second: int = REQUESTS_PER_SECOND) -> pd.DataFrame:
     """Fetch historical market data from Fyers API.
+
+    Only the days which are not cached on disk yet are requested, daily resolutions are never cached.
+    The chunks are requested concurrently, so the total time taken approaches that of the slowest
+    request rather than the sum of all of them. The concurrency is bounded so that the API rate limits are respected.
     
     Args:
-        session (fyersModel.FyersModel): An API access authenticated FyersModel.
+        session (fyersModel.FyersModel): An API access authenticated FyersModel in async mode, its HTTP session is closed once done.
         symbol (str): The symbol for which the historical data is to be fetched.
         resolution (str): The resolution of the data to be fetched ex "D" for 1-day, "1" for 1-min etc.
         start_date (str): The start date for fetching the historical data in the format dd-mm-YYYY.
         end_date (str): The end date for fetching the historical data in the format dd-mm-YYYY.
+        max_connections (int): The maximum number of requests in flight at once.
+        requests_per_second (int): The maximum number of requests made per second.
 
     Returns:
         pd.DataFrame: A dataframe of OHLC data of the requested symbol, at the requested resolution for the period requested. 
     """
-    date_ranges = get_date_ranges(start_date, end_date, resolution)
-    all_data = []
+    days = list(pd.date_range(dt.datetime.strptime(start_date, "%d-%m-%Y"), dt.datetime.strptime(end_date, "%d-%m-%Y")).date)
+    use_cache = resolution not in UNCACHED_RESOLUTIONS
+    cached_data = load_cached_data(symbol, resolution, days) if use_cache else {}
+    date_ranges = get_missing_date_ranges(days, cached_data.keys(), resolution)
+    semaphore = asyncio.Semaphore(max_connections)
+    limiter = AsyncLimiter(requests_per_second, 1)
     try:
-        for start, end in date_ranges:
-            response = session.history({"symbol": symbol, "resolution": resolution, "date_format": "1", "range_from": start, "range_to": end})
-            if response["candles"]:
-                all_data.append(np.array(response["candles"]))
-                logger_main.info(f"Fetched data: {start} to {end}")
-            else:
-                raise Exception(f"Data not available for {start} to {end}")
-        return format_historical_prices(np.vstack(all_data)) if all_data else pd.DataFrame()
+        day_data = {}
+        if date_ranges:
+            tasks = [asyncio.create_task(_fetch_one(session, semaphore, limiter, symbol, resolution, start, end)) for start, end in date_ranges]
+            try:
+                # gather returns results in the order of date_ranges, so no sorting is needed
+                all_data = await asyncio.gather(*tasks)
+            finally:
+                # gather does not cancel the other chunks when one fails, they must be finished before the
+                # session is closed or a waiting chunk would open a new aiohttp session which is never closed
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await session.close()  # The aiohttp session is bound to the running event loop
+            df = format_historical_prices(all_data)
+            if not use_cache:
+                return df
+            fetched_days = [day for start, end in date_ranges for day in pd.date_range(start, end).date]
+            day_data = split_data_by_day(df, fetched_days)
+            save_data_to_cache(day_data, symbol, resolution)
+        frames = [day_data[day] if day in day_data else cached_data[day] for day in days]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     except Exception as e:
-        logger_main.error(f"Error fetching historical data: {e}")
+        logger_main.error("Error fetching historical data: %s", e)
         raise
 
 def save_data_to_csv(df: pd.DataFrame, filename: str) -> None:
     """Save DataFrame to CSV.
 
+    The CSV is written by pyarrow's C++ writer, which is much faster than `DataFrame.to_csv` for large dataframes.
+
     Args:
         df (pd.DataFrame): The dataframe to be saved.
+        filename (str): The name of the CSV file, which is saved in SAVE_TO_FOLDER.
     
     Returns:
         None
     """
     try:
-        df.to_csv(os.path.join(SAVE_TO_FOLDER, filename), index=False)
-        logger_main.info(f"Data saved: {os.path.join(SAVE_TO_FOLDER, filename)}")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # Candles are floored to the minute, so write them without the nanosecond fraction
+        table = table.set_column(0, "date_time", table.column("date_time").cast(pa.timestamp("s")))
+        with open(os.path.join(SAVE_TO_FOLDER, filename), "wb") as f:
+            # pyarrow quotes the header names, so write the header as to_csv did
+            f.write((",".join(table.column_names) + "\n").encode("utf-8"))
+            pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(include_header=False))
+        logger_main.info("Data saved: %s", os.path.join(SAVE_TO_FOLDER, filename))
     except Exception as e:
-        logger_main.error(f"Error saving data: {e}")
+        logger_main.error("Error saving data: %s", e)
         raise
 
 def main():
@@ -269,13 +530,14 @@ def main():
         access_token = read_access_token(ACCESS_TOKEN_FNAME)
     else:
         auth_link = get_authentication_link(credentials)
-        logger_main.info(f"Open the following link in your browser and authenticate: {auth_link}")
+        logger_main.info("Open the following link in your browser and authenticate: %s", auth_link)
         port = int(credentials["RedirectURI"].split(":")[-1])
         auth_code = auth_hand.run_local_server(port) # start a local server and keep listening for redirection
         access_token = generate_access_token(credentials, auth_code)
         write_access_token(access_token, ACCESS_TOKEN_FNAME)
     session = create_fyers_session(credentials, access_token)
-    df = fetch_historical_data(session, data_parameters["ScriptName"], data_parameters["Resolution"], data_parameters["StartDate"], data_parameters["EndDate"])
+    df = asyncio.run(fetch_historical_data(session, data_parameters["ScriptName"], data_parameters["Resolution"], data_parameters["StartDate"], data_parameters["EndDate"],
+                                           credentials.get("MaxConnections", MAX_CONNECTIONS), credentials.get("RequestsPerSecond", REQUESTS_PER_SECOND)))
     if not df.empty:
         filename = f"{data_parameters['ScriptName'].split(':')[1]}_{data_parameters['Resolution']}_{data_parameters['StartDate']}_to_{data_parameters['EndDate']}.csv"
         save_data_to_csv(df, filename)
@@ -5,77 +5,123 @@ Works stand-alone inside the fyers-data-fetcher repo.
 Brian Pinto – MIT licence
 """
 
-import json, time, threading, signal, sys
-import websocket  # pip install websocket-client
+import asyncio, queue, signal, sys, threading
+import orjson     # pip install orjson
+import websockets # pip install websockets
 import ssl        
+import config_cache
 # ---------- config ----------------------------------------------------------
 CRED_FILE        = "api_cred.json"          # same file used by historical fetcher
 TOKEN_FILE       = "access_token.txt"       # created after 1st login
 SUBSCRIPTIONS    = ["NSE:NIFTY50-INDEX", "NSE:BANKNIFTY-INDEX"]  # add your own
 DATA_MODE        = "symbolUpdate"           # "symbolUpdate"=full OHLCV, "l2Update"=LTP only
+TICK_BATCH_SIZE  = 500                      # max ticks written to stdout per flush
 # ---------------------------------------------------------------------------
 
+# tick print templates, built once instead of formatting an f-string per tick
+# (Vol uses %s as the volume is printed as sent, like the former {:>10})
+_FULL_FMT = "%s  LTP %8.2f  O %8.2f  H %8.2f  L %8.2f  C %8.2f  Vol %10s\n"
+_LTP_FMT  = "%s  LTP %8.2f\n"
+
+# raw ticks handed from the receive loop to the printer thread, None stops it
+_tick_q = queue.SimpleQueue()
+
 def _load_creds():
-    with open(CRED_FILE) as f:
-        c = json.load(f)
+    c = config_cache.load_json(CRED_FILE)
     return c["ClientID"], c["SecretID"], c["RedirectURI"]
 
 def _load_token():
     try:
-        with open(TOKEN_FILE) as f:
-            return f.read().strip()
+        return config_cache.load_text(TOKEN_FILE).strip()
     except FileNotFoundError:
         print(f"[ERROR] {TOKEN_FILE} not found. Run historical fetcher once to generate it.")
         sys.exit(1)
 
-def _on_open(ws):
+async def _on_open(ws):
     print("🟢 WebSocket connected – subscribing …")
     subscribe = {
         "T": "SUB_L2",
         "S": SUBSCRIPTIONS,
         "MK": DATA_MODE
     }
-    ws.send(json.dumps(subscribe))
-
-def _on_message(ws, msg):
-    data = json.loads(msg)
-    # FYERS sends one dict per tick; print something readable
-    if "l" in data:          # full OHLCV
-        print(f"{data['tk']}  "
-              f"LTP {data['ltp']:>8.2f}  "
-              f"O {data['o']:>8.2f}  "
-              f"H {data['h']:>8.2f}  "
-              f"L {data['l']:>8.2f}  "
-              f"C {data['c']:>8.2f}  "
-              f"Vol {data['v']:>10}")
-    else:                    # LTP only
-        print(f"{data['tk']}  LTP {data['ltp']:>8.2f}")
-
-def _on_error(ws, err):
+    await ws.send(orjson.dumps(subscribe).decode())   # str is sent as a text frame
+
+def _on_message(msg):
+    # keep the receive loop free: parsing and printing happen in _print_ticks
+    _tick_q.put_nowait(msg)
+
+def _format_tick(msg):
+    try:
+        data = orjson.loads(msg)
+        # FYERS sends one dict per tick; print something readable
+        if "l" in data:          # full OHLCV
+            return _FULL_FMT % (data['tk'], data['ltp'], data['o'], data['h'], data['l'], data['c'], data['v'])
+        else:                    # LTP only
+            return _LTP_FMT % (data['tk'], data['ltp'])
+    except (orjson.JSONDecodeError, KeyError, TypeError) as err:
+        # a malformed tick, not a connection problem: show it with its raw payload and carry on
+        return f"⚠️  bad tick ({type(err).__name__}: {err}): {msg!r}\n"
+
+def _print_ticks():
+    # drain whatever has queued up and write it with a single flush
+    while True:
+        batch = [_tick_q.get()]
+        try:
+            while len(batch) < TICK_BATCH_SIZE:
+                batch.append(_tick_q.get_nowait())
+        except queue.Empty:
+            pass
+        stop = batch[-1] is None
+        if stop:
+            batch.pop()
+        sys.stdout.write("".join(map(_format_tick, batch)))
+        sys.stdout.flush()
+        if stop:
+            return
+
+def _on_error(err):
     print("🔴 WS error:", err)
 
-def _on_close(ws, close_status_code, close_msg):
+def _on_close():
     print("🔌 WebSocket closed")
 
-def _sigint(*_):
+def _sigint(task):
     print("\n🛑 Ctrl-C – closing …")
-    ws.close()
-    sys.exit(0)
+    task.cancel()
 
-if __name__ == "__main__":
-    signal.signal(signal.SIGINT, _sigint)
+async def run(ws_url):
+    # Ctrl-C cancels this task, which closes the socket on the way out of `async with`
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGINT, _sigint, asyncio.current_task())
+
+    # SSL verification disabled (dev only)
+    ssl_ctx = ssl.create_default_context()
+    ssl_ctx.check_hostname = False
+    ssl_ctx.verify_mode = ssl.CERT_NONE
+
+    printer = threading.Thread(target=_print_ticks, daemon=True)
+    printer.start()
+    try:
+        # no permessage-deflate: inflating tiny, frequent ticks costs more CPU than it saves bandwidth;
+        # no frame size cap and a deep receive queue so bursts are buffered instead of pausing reads
+        async with websockets.connect(ws_url, ssl=ssl_ctx, compression=None,
+                                      max_size=None, max_queue=1024) as ws:
+            await _on_open(ws)
+            async for msg in ws:
+                _on_message(msg)
+    except asyncio.CancelledError:
+        pass
+    except Exception as err:
+        _on_error(err)
+    _tick_q.put(None)
+    printer.join()
+    _on_close()
 
+if __name__ == "__main__":
     client_id, _, _ = _load_creds()
     access_token = _load_token()
 
     ws_url = ("wss://api.fyers.in/socket/v3/data?"
               f"access_token={client_id}:{access_token}")
 
-    ws = websocket.WebSocketApp(ws_url,
-                                on_open=_on_open,
-                                on_message=_on_message,
-                                on_error=_on_error,
-                                on_close=_on_close)
-
-    # run forever with SSL verification disabled (dev only)
-    ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
\ No newline at end of file
+    asyncio.run(run(ws_url))